@@ -12,13 +12,17 @@ import random
 import re
 import time
 import uuid as uuid_lib
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import streamlit as st
-from typing import Optional
+import streamlit.components.v1 as components
+from streamlit.errors import StreamlitAPIException
+from typing import NamedTuple, Optional
 from zoneinfo import ZoneInfo
 from doc_export import export_dialogue_to_docx
 from dotenv import load_dotenv
-from model import call_model_for_agent, get_model_status, get_tavily_client, get_tavily_status
+from model import call_model_for_agent, get_model_status, get_tavily_status
 from supabase_client import (
     conversation_exists,
     create_conversation,
@@ -30,10 +34,15 @@ from supabase_client import (
     persist_message,
 )
 
-# Load .env from the directory containing this script (so it works when run via streamlit run app.py from any cwd)
-_load_env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
-load_dotenv(_load_env_path)
-load_dotenv()  # also load from current working directory
+@st.cache_resource
+def _load_env() -> None:
+    """Load .env once per process. Streamlit re-executes this script on every rerun, so a plain module-level call would re-read the files each time."""
+    # Load .env from the directory containing this script (so it works when run via streamlit run app.py from any cwd)
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+    load_dotenv()  # also load from current working directory
+
+
+_load_env()
 
 
 def _is_streamlit_cloud() -> bool:
@@ -71,6 +80,38 @@ ROLE_MODERATOR = "moderator"
 AGENT_CROSS_MENTION_N = 0   # max consecutive agent messages before requiring human/Respond
 AGENT_CROSS_MENTION_P = 0.35 # probability of triggering the other agent after a reply when not @mentioned (0 = only @mention triggers)
 REFLECTION_DURATION_DEFAULT_MINUTES = 5  # default for "Reflect together" (sidebar: 1–10 min)
+HISTORY_PAGE_SIZE = 50  # conversation history shows the latest N messages; "Show older messages" adds another page
+
+# Column width specs (immutable; reused on every rerun and fragment tick)
+_COLS_4_1 = (4, 1)  # chat input / agent role row + Respond button
+_COLS_5_1 = (5, 1)  # sidebar conversation row + delete button
+_COLS_3_1 = (3, 1)  # Reverse order + Export to doc
+
+
+class DialogueEntry(NamedTuple):
+    """One message in st.session_state.dialogue. label is the author display name from DB (None for not-yet-reloaded local appends)
+    and row_id the od_messages id (None likewise).
+    ts_display is ts pre-formatted in PST so rendering and transcript building do no datetime work; attributed is the
+    entry's transcript line ("At <ts> <name> said: <content>") for the agent prompt. Build via _dialogue_entry()."""
+    party: str
+    content: str
+    ts: Optional[datetime] = None
+    label: Optional[str] = None
+    ts_display: str = ""
+    attributed: str = ""
+    row_id: Optional[int] = None
+
+
+# Focus script for the chat input. components.html runs in an iframe, so query the parent document.
+_FOCUS_CHAT_INPUT_JS = """
+<script>
+(function() {
+    var doc = window.parent.document;
+    var el = doc.querySelector('textarea[placeholder*="Type a message"]') || doc.querySelector('[data-testid="stChatInput"] textarea');
+    if (el) { el.focus(); }
+})();
+</script>
+"""
 
 
 OD_PRINCIPLES = """
@@ -281,18 +322,23 @@ def _get_agent_role(agent_key: str, moderator_name: str, reflection_mode: bool =
             f"Offer your own distinct perspective: agree or disagree from your angle, add a new idea or thought, or question something that was said. "
             f"If {other} just resplied before you - respond to their reflection with a different take. Do not merely echo it or rephrase it. "
         )
+    base += f"\n\nWhen replying, produce only {name}'s next message in first person."
     return base
 
 
 def init_session_state():
     if "dialogue" not in st.session_state:
-        st.session_state.dialogue = []  # list of (party, content, timestamp)
+        st.session_state.dialogue = []  # list of DialogueEntry
+    if "agents_spoken" not in st.session_state:
+        st.session_state.agents_spoken = set()  # agent keys with at least one entry in dialogue; maintained by _set_dialogue / _append_dialogue
     if "send_as_radio" not in st.session_state:
         st.session_state.send_as_radio = "Moderator"
     if "send_as_radio_prev" not in st.session_state:
         st.session_state.send_as_radio_prev = st.session_state.send_as_radio
     if "dialogue_newest_first" not in st.session_state:
         st.session_state.dialogue_newest_first = True  # True = newest first, False = chronological
+    if "history_visible_n" not in st.session_state:
+        st.session_state.history_visible_n = HISTORY_PAGE_SIZE  # how many of the latest messages the history renders
     # Store only role text (no name); name stays fixed from constants
     if "agent1_role" not in st.session_state:
         st.session_state.agent1_role = AGENT_1_ROLE
@@ -327,8 +373,9 @@ def init_session_state():
         _prev_id = st.session_state.get("conversation_id")
         st.session_state.conversation_id = _param_id
         if _prev_id != _param_id:
-            st.session_state.dialogue = []
+            _set_dialogue([])
             st.session_state.loaded_conversation_id = None
+            st.session_state.history_visible_n = HISTORY_PAGE_SIZE
     else:
         # Only clear when URL had an invalid param; when param is missing, keep session state (query params can be dropped on reruns)
         if _param_id:
@@ -343,6 +390,7 @@ def init_session_state():
         if recent and recent[0].get("id"):
             cid = recent[0]["id"]
             st.session_state.conversation_id = cid
+            st.session_state.history_visible_n = HISTORY_PAGE_SIZE
             st.query_params["conversation_id"] = cid
     if "conversation_list_cache_ts" not in st.session_state:
         st.session_state.conversation_list_cache_ts = 0.0
@@ -364,10 +412,25 @@ def _get_agent_role_text_only(agent_key: str) -> str:
     return st.session_state.get("agent2_role", AGENT_2_ROLE)
 
 
+def _set_moderator_name(name: str) -> None:
+    """Set the moderator display name and invalidate the cached speaker labels."""
+    st.session_state.moderator_name = name
+    st.session_state._speaker_labels = None
+
+
+def _speaker_labels() -> dict[str, str]:
+    """Party key -> display label for history and export (moderator uses session moderator_name).
+    Built once per session and cached in session state; _set_moderator_name invalidates it."""
+    labels = st.session_state.get("_speaker_labels")
+    if labels is None:
+        labels = {ROLE_INSTRUCTOR: "Instructor", ROLE_MODERATOR: _get_moderator_display_name(), "agent1": AGENT_1_NAME, "agent2": AGENT_2_NAME}
+        st.session_state._speaker_labels = labels
+    return labels
+
+
 def _speaker_label(party: str) -> str:
     """Return display label for a party in the dialogue (moderator uses session moderator_name)."""
-    labels = {ROLE_INSTRUCTOR: "Instructor", ROLE_MODERATOR: _get_moderator_display_name(), "agent1": AGENT_1_NAME, "agent2": AGENT_2_NAME}
-    return labels.get(party, party)
+    return _speaker_labels().get(party, party)
 
 
 def _dedupe_conv_list(cache: list | None) -> list:
@@ -384,6 +447,30 @@ def _dedupe_conv_list(cache: list | None) -> list:
     return out
 
 
+def _conversation_label(created) -> str:
+    """Sidebar button label for a conversation: 'Conversation · <created in PST>', truncated to 45 chars."""
+    created_str = _format_in_pst(created, "%Y-%m-%d %H:%M:%S") if created is not None else ""
+    if not created_str and created is not None:
+        created_str = (str(created) if created else "")[:19].replace("T", " ")
+    label = "Conversation · " + created_str
+    if len(label) > 45:
+        label = label[:42] + "..."
+    return label
+
+
+def _sidebar_conv_rows(cache: list | None) -> list[dict]:
+    """Deduped conversations with a precomputed 'label', so the 10s sidebar tick does no timestamp formatting."""
+    return [{**c, "label": _conversation_label(c.get("created_at"))} for c in _dedupe_conv_list(cache)]
+
+
+def _rerun_fragment() -> None:
+    """Rerun only the current fragment; a full rerun when the click is handled during a full-app run (fragment scope raises there)."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
 def _clear_conversation_state(
     *,
     invalidate_list_cache: bool = True,
@@ -392,8 +479,9 @@ def _clear_conversation_state(
     """Clear current conversation from session state. Optionally invalidate sidebar list cache and/or query params."""
     st.session_state.conversation_id = ""
     st.session_state.loaded_conversation_id = None
-    st.session_state.dialogue = []
+    _set_dialogue([])
     st.session_state.agent_chain_count = 0
+    st.session_state.history_visible_n = HISTORY_PAGE_SIZE
     if invalidate_list_cache:
         st.session_state.conversation_list_cache = None
         st.session_state.conversation_list_cache_ts = 0.0
@@ -401,15 +489,13 @@ def _clear_conversation_state(
         st.query_params.clear()
 
 
+# Author display name stored in DB -> party key; names are constants. Any other name is a human moderator.
+_AUTHOR_TO_PARTY = {"Instructor": ROLE_INSTRUCTOR, AGENT_1_NAME: "agent1", AGENT_2_NAME: "agent2"}
+
+
 def _author_display_name_to_party(author_display_name: str) -> str:
     """Map author display name from DB back to party key (instructor, moderator, agent1, agent2)."""
-    if author_display_name == "Instructor":
-        return ROLE_INSTRUCTOR
-    if author_display_name == AGENT_1_NAME:
-        return "agent1"
-    if author_display_name == AGENT_2_NAME:
-        return "agent2"
-    return ROLE_MODERATOR  # any other human name
+    return _AUTHOR_TO_PARTY.get(author_display_name, ROLE_MODERATOR)
 
 
 def _mention_pattern_for_name(name: str) -> str:
@@ -417,33 +503,40 @@ def _mention_pattern_for_name(name: str) -> str:
     if not name:
         return ""
     lower = name.lower()
-    # @\s* + first char + (char2)? + (char3)? + ... so we match @g, @go, @gosha, etc.
-    pattern = r"@\s*" + re.escape(lower[0])
-    for i in range(1, len(lower)):
-        pattern += "(" + re.escape(lower[i]) + ")?"
-    return pattern
+    # @\s*(?:gosha|gosh|gos|go|g): non-capturing prefixes, longest first so the full name wins
+    prefixes = [re.escape(lower[:i]) for i in range(len(lower), 0, -1)]
+    return r"@\s*(?:" + "|".join(prefixes) + ")"
+
+
+# Compiled once at import: agent key -> (@mention regex, full name). Names are constants.
+_MENTION_RES = {
+    key: (re.compile(_mention_pattern_for_name(name), re.IGNORECASE), name)
+    for key, name in (("agent1", AGENT_1_NAME), ("agent2", AGENT_2_NAME))
+    if name
+}
+# Single pass for detection: one alternation with a named group per agent (group name = agent key).
+# If two names shared a first letter, the earlier agent's group would win for the shared prefix.
+_MENTION_RE = re.compile(
+    "|".join(f"(?P<{key}>{mention_re.pattern})" for key, (mention_re, _name) in _MENTION_RES.items()) or r"(?!)",
+    re.IGNORECASE,
+)
+# Word-boundary, case-insensitive full-name match ("Joshi" matches but "Josh" doesn't)
+_NAME_WORD_RES = {name: re.compile(r"\b" + re.escape(name) + r"\b", re.IGNORECASE) for name in (AGENT_1_NAME, AGENT_2_NAME) if name}
+_AT_TIMESTAMP_SAID_RE = re.compile(r"^At\s+\d{4}-\d{2}-\d{2}\s+\d{1,2}:\d{2}(?:\d{2})?\s+\S+\s+said:\s*", re.IGNORECASE)
 
 
 def _mentioned_agents(text: str) -> list[str]:
     """Return agent keys when @-mentioned: @ or @ then space, then first letter or any prefix of name (e.g. @g, @ gosha). Full name without @ does NOT trigger."""
-    mentioned = []
-    lower = text.lower()
-    if AGENT_1_NAME:
-        if re.search(_mention_pattern_for_name(AGENT_1_NAME), lower):
-            mentioned.append("agent1")
-    if AGENT_2_NAME:
-        if re.search(_mention_pattern_for_name(AGENT_2_NAME), lower):
-            mentioned.append("agent2")
-    return mentioned
+    # Keys in the order they are first mentioned in the text; dict.fromkeys dedupes repeated mentions
+    return list(dict.fromkeys(m.lastgroup for m in _MENTION_RE.finditer(text)))
 
 
 def _agent_name_as_word_in_text(text: str, name: str) -> bool:
     """True if the agent's full name appears as a word (e.g. 'Joshi' or ', Joshi?'). Used for agent-to-agent so addressing by name triggers a reply even without @."""
     if not text or not name:
         return False
-    # Word boundary so "Joshi" matches but "Josh" doesn't; case-insensitive
-    pattern = r"\b" + re.escape(name) + r"\b"
-    return bool(re.search(pattern, text, re.IGNORECASE))
+    name_re = _NAME_WORD_RES.get(name) or re.compile(r"\b" + re.escape(name) + r"\b", re.IGNORECASE)
+    return bool(name_re.search(text))
 
 
 def _expand_mentions_to_names(text: str) -> str:
@@ -451,10 +544,8 @@ def _expand_mentions_to_names(text: str) -> str:
     if not text:
         return text
     result = text
-    if AGENT_1_NAME:
-        result = re.sub(_mention_pattern_for_name(AGENT_1_NAME), AGENT_1_NAME, result, flags=re.IGNORECASE)
-    if AGENT_2_NAME:
-        result = re.sub(_mention_pattern_for_name(AGENT_2_NAME), AGENT_2_NAME, result, flags=re.IGNORECASE)
+    for mention_re, name in _MENTION_RES.values():
+        result = mention_re.sub(name, result)
     return result
 
 
@@ -463,7 +554,7 @@ def _strip_at_timestamp_said_prefix(content: str) -> str:
     if not content or not content.strip():
         return content
     text = content.strip()
-    m = re.match(r"^At\s+\d{4}-\d{2}-\d{2}\s+\d{1,2}:\d{2}(?:\d{2})?\s+\S+\s+said:\s*", text, re.IGNORECASE)
+    m = _AT_TIMESTAMP_SAID_RE.match(text)
     if m:
         text = text[m.end() :].strip()
     return text or content
@@ -485,21 +576,85 @@ def _strip_agent_name_prefix(content: str, agent_name: str) -> str:
     return text or content
 
 
+def _set_dialogue(dialogue: list, new_entries: Optional[list] = None) -> None:
+    """Replace the session dialogue and update agents_spoken. Pass new_entries when dialogue only adds them to the
+    current one (incremental load), so only those are scanned; otherwise the whole dialogue is."""
+    st.session_state.dialogue = dialogue
+    if new_entries is None:
+        st.session_state.agents_spoken = {e.party for e in dialogue if e.party in ("agent1", "agent2")}
+    else:
+        st.session_state.agents_spoken.update(e.party for e in new_entries if e.party in ("agent1", "agent2"))
+
+
+def _append_dialogue(entry: DialogueEntry) -> None:
+    """Append one entry to the session dialogue and update agents_spoken."""
+    st.session_state.dialogue.append(entry)
+    if entry.party in ("agent1", "agent2"):
+        st.session_state.agents_spoken.add(entry.party)
+
+
 def _agent_has_spoken(speaker: str) -> bool:
     """True if this agent has already posted at least one message in the dialogue."""
-    return any(entry[0] == speaker for entry in st.session_state.dialogue)
+    return speaker in st.session_state.agents_spoken
 
 
-def _sync_agent_intro_state_from_dialogue(dialogue: Optional[list] = None) -> None:
-    """Set agent*_needs_intro to False if that agent has already posted. Uses provided dialogue or session state (e.g. after loading from DB)."""
-    if dialogue is None:
-        dialogue = st.session_state.get("dialogue") or []
-    if any(entry[0] == "agent1" for entry in dialogue):
+def _sync_agent_intro_state_from_dialogue() -> None:
+    """Set agent*_needs_intro to False if that agent has already posted (e.g. after loading from DB)."""
+    if _agent_has_spoken("agent1"):
         st.session_state.agent1_needs_intro = False
-    if any(entry[0] == "agent2" for entry in dialogue):
+    if _agent_has_spoken("agent2"):
         st.session_state.agent2_needs_intro = False
 
 
+def _dialogue_entry(
+    party: str, content: str, ts: Optional[datetime], label: Optional[str] = None, row_id: Optional[int] = None
+) -> DialogueEntry:
+    """Build a dialogue entry once at ingest: format its timestamp, strip any echoed agent-name prefix, and attribute it for the transcript."""
+    if party == "agent1" or party == "agent2":
+        content = _strip_agent_name_prefix(content, label or (AGENT_1_NAME if party == "agent1" else AGENT_2_NAME))
+    ts_display = _format_in_pst(ts, "%Y-%m-%d %H:%M")
+    attributed = f"At {ts_display} {label or _speaker_label(party)} said: {content}"
+    return DialogueEntry(party, content, ts, label, ts_display, attributed, row_id)
+
+
+def _dialogue_entries_from_rows(rows: list[tuple]) -> list[DialogueEntry]:
+    """Convert (author_display_name, message, datetime, id) rows from DB to dialogue entries."""
+    return [_dialogue_entry(_author_display_name_to_party(a), m, t, a, i) for a, m, t, i in rows]
+
+
+# Incremental reloads re-read this far back from the newest loaded row. created_at is now() at the start of the
+# inserting transaction, so a row can commit after a later-stamped row was already fetched; a plain "> last_ts" delta
+# would skip it for good. Rows re-read from the overlap are skipped by id.
+_RELOAD_OVERLAP = timedelta(seconds=10)
+
+
+def _load_rows_after(conversation_id: str, last_ts: datetime, seen_ids: set) -> list[tuple]:
+    """Rows created from last_ts - _RELOAD_OVERLAP on, minus those whose id is in seen_ids."""
+    return [r for r in load_messages_since(conversation_id, last_ts - _RELOAD_OVERLAP) if r[3] not in seen_ids]
+
+
+def _recent_entry_ids(dialogue: list, last_ts: datetime) -> set:
+    """DB ids of the dialogue entries inside the reload overlap before last_ts (the only ones a delta can return again)."""
+    since = last_ts - _RELOAD_OVERLAP
+    ids = set()
+    for entry in reversed(dialogue):
+        if entry.row_id is None:
+            continue
+        if entry.ts < since:
+            break
+        ids.add(entry.row_id)
+    return ids
+
+
+def _merge_db_entries(current: list, new_entries: list) -> list:
+    """DB-backed entries of current plus new_entries, in (created_at, id) order. Local appends (label None) are dropped
+    since their DB rows arrive with the delta. A late-committed row can sort before rows already held."""
+    kept = [e for e in current if e.label is not None]
+    if not new_entries:
+        return kept
+    return sorted(kept + new_entries, key=lambda e: (e.ts, e.row_id))
+
+
 def _dialogue_equals(current: list, new_dialogue: list) -> bool:
     """Quick check: same length and same last message (party, content) means no visible change."""
     if len(current) != len(new_dialogue):
@@ -507,16 +662,66 @@ def _dialogue_equals(current: list, new_dialogue: list) -> bool:
     if not current:
         return True
     c_last, n_last = current[-1], new_dialogue[-1]
-    return (c_last[0], c_last[1]) == (n_last[0], n_last[1])
+    return (c_last.party, c_last.content) == (n_last.party, n_last.content)
+
+
+@st.cache_data(show_spinner=False, ttl=300, max_entries=64)
+def _load_messages_cached(conversation_id: str) -> tuple[float, list[tuple]]:
+    """Memoized load_messages keyed by conversation_id. Returns (fetched_at, rows)."""
+    return time.time(), load_messages(conversation_id)
+
+
+def _load_conversation_rows(conversation_id: str) -> list[tuple]:
+    """Full history for a conversation. Served from the memoized load; on a cache hit only rows newer than the cached ones are fetched (other users may have posted)."""
+    requested_at = time.time()
+    fetched_at, rows = _load_messages_cached(conversation_id)
+    if fetched_at < requested_at:
+        if rows:
+            last_ts = rows[-1][2]
+            newer = _load_rows_after(conversation_id, last_ts, {r[3] for r in rows if r[2] >= last_ts - _RELOAD_OVERLAP})
+            if newer:
+                rows = sorted(rows + newer, key=lambda r: (r[2], r[3]))
+        else:
+            rows = load_messages(conversation_id)
+    return rows
+
+
+@st.cache_resource
+def _db_executor() -> ThreadPoolExecutor:
+    """Process-wide worker pool for overlapping independent Supabase round trips."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="od-db")
+
+
+@st.cache_data(show_spinner=False, ttl=60)
+def _status_captions() -> tuple[str, str]:
+    """(model status, web search status) captions for the page header. They only depend on env and the process-wide
+    Tavily client, so one computation serves every rerun and session for a minute."""
+    return get_model_status(AGENT_1_NAME, AGENT_2_NAME), get_tavily_status()
+
+
+def _last_db_ts(dialogue: list) -> Optional[datetime]:
+    """created_at of the newest entry that came from the DB. Local appends awaiting reload (label None) are skipped."""
+    for entry in reversed(dialogue):
+        if entry.label is not None:
+            return entry.ts
+    return None
 
 
 def _reload_dialogue_from_db() -> None:
-    """Reload the full conversation history from DB and sync intro state. Keeps all participants in sync."""
+    """Reload the conversation history from DB and sync intro state. Keeps all participants in sync.
+    When this conversation is already loaded, only rows from the last DB-backed entry (minus _RELOAD_OVERLAP) on are
+    fetched and merged by id; local appends are dropped since their DB rows arrive with that delta. Full load
+    (memoized) on first load or conversation switch."""
     conv_id = st.session_state.get("conversation_id") or ""
     if not conv_id or not get_supabase():
         return
-    loaded = load_messages(conv_id)
-    st.session_state.dialogue = [(_author_display_name_to_party(a), m, t, a) for a, m, t in loaded]
+    current = st.session_state.get("dialogue") or []
+    last_ts = _last_db_ts(current) if st.session_state.get("loaded_conversation_id") == conv_id else None
+    if last_ts is not None:
+        new_entries = _dialogue_entries_from_rows(_load_rows_after(conv_id, last_ts, _recent_entry_ids(current, last_ts)))
+        _set_dialogue(_merge_db_entries(current, new_entries), new_entries)
+    else:
+        _set_dialogue(_dialogue_entries_from_rows(_load_conversation_rows(conv_id)))
     st.session_state.loaded_conversation_id = conv_id
     _sync_agent_intro_state_from_dialogue()
 
@@ -549,7 +754,7 @@ def _render_agent_role_row(agent_key: str, agent_name: str, agent_role: str, rol
                     st.session_state[f"{agent_key}_needs_intro"] = True
                     st.session_state.agent_chain_count = 0  # human action resets agent chain
                     msg = f"Updated {agent_name}'s role:\n\n{new_role}"
-                    st.session_state.dialogue.append((ROLE_INSTRUCTOR, msg, datetime.now(_UTC)))
+                    _append_dialogue(_dialogue_entry(ROLE_INSTRUCTOR, msg, datetime.now(_UTC)))
                     persist_message(st.session_state.get("conversation_id") or "", _speaker_label(ROLE_INSTRUCTOR), msg)
                     _reload_dialogue_from_db()
                     st.rerun()
@@ -557,48 +762,77 @@ def _render_agent_role_row(agent_key: str, agent_name: str, agent_role: str, rol
         _render_agent_respond_button(agent_key, button_col)
 
 
-def build_messages_for_agent(role_prompt: str, speaker: str, role_text_only: str | None = None) -> list:
-    """Build OpenAI messages from the full dialogue in chronological order (oldest first). Each message is attributed so the agent has full context."""
-    tools_instruction = ""
-    if get_tavily_client():
-        tools_instruction = (
-            "\n\nYou have access to a web_search tool. You MUST use it whenever the user asks about: "
-            "recent or future events, current facts, or anything after your knowledge cutoff date. "
-            "Do not say you don't have information — call web_search first with a clear query, then answer using the results. "
-            "After receiving search results, use them to inform your response."
-        )
+def _dialogue_transcript() -> str:
+    """Dialogue serialized as "At <timestamp> <name> said: <content>" blocks, oldest first.
+    Cached in session state per conversation; only entries appended since the last build are joined (each entry carries its attributed line).
+    Rebuilt from scratch when the dialogue was replaced (conversation switch or reload that changed the prefix)."""
+    dialogue = st.session_state.dialogue
+    conv_id = st.session_state.get("conversation_id") or ""
+    cache = st.session_state.get("_transcript_cache")
+    n = cache["n"] if cache and cache["conv_id"] == conv_id else 0
+    if n and (n > len(dialogue) or dialogue[n - 1] != cache["last"]):
+        n = 0
+    lines = [e.attributed for e in dialogue[n:]]
+    if n:
+        text = "\n\n".join([cache["text"], *lines]) if lines else cache["text"]
+    else:
+        text = "\n\n".join(lines)
+    if dialogue:
+        st.session_state._transcript_cache = {"conv_id": conv_id, "n": len(dialogue), "last": dialogue[-1], "text": text}
+    return text
+
+
+def _dialogue_docx_bytes(speaker_labels: dict) -> bytes:
+    """Word export of the session dialogue. The history fragment reruns every few seconds and the download button
+    needs its bytes up front, so the last export is kept in session state and rebuilt only when the dialogue
+    (conversation, length, first/last entry) or the speaker labels changed."""
+    dialogue = st.session_state.dialogue
+    key = (st.session_state.get("conversation_id") or "", len(dialogue), dialogue[0], dialogue[-1], tuple(speaker_labels.items()))
+    cache = st.session_state.get("_export_cache")
+    if cache is None or cache[0] != key:
+        cache = (key, export_dialogue_to_docx(dialogue, speaker_labels))
+        st.session_state._export_cache = cache
+    return cache[1]
+
+
+# System-prompt suffixes for build_messages_for_agent (constant text; only the role is filled in per call)
+_TOOLS_INSTRUCTION = (
+    "\n\nYou have access to a web_search tool. You MUST use it whenever the user asks about: "
+    "recent or future events, current facts, or anything after your knowledge cutoff date. "
+    "Do not say you don't have information — call web_search first with a clear query, then answer using the results. "
+    "After receiving search results, use them to inform your response."
+)
+_INTRO_INSTRUCTION_TMPL = (
+    "\n\nYou must begin this message by clearly introducing yourself: state your name, then state your role. "
+    "Your role is: {role} "
+    "Include both your name and this role in your opening sentence or two, then respond to the discussion."
+)
+
+
+def build_messages_for_agent(role_prompt: str, speaker: str, role_text_only: str | None = None, tavily_enabled: bool = False) -> list:
+    """Build OpenAI messages from the full dialogue in chronological order (oldest first). Each message is attributed so the agent has full context.
+    tavily_enabled is decided once by the model call (same flag that decides whether the web_search tool is offered)."""
+    tools_instruction = _TOOLS_INSTRUCTION if tavily_enabled else ""
     intro_required = (
         not _agent_has_spoken(speaker)
         or (speaker == "agent1" and st.session_state.get("agent1_needs_intro", False))
         or (speaker == "agent2" and st.session_state.get("agent2_needs_intro", False))
     )
     if intro_required:
-        intro = (
-            "\n\nYou must begin this message by clearly introducing yourself: state your name, then state your role. "
-            "Your role is: " + (role_text_only or "as defined above") + " "
-            "Include both your name and this role in your opening sentence or two, then respond to the discussion."
-        )
-        tools_instruction += intro
+        tools_instruction += _INTRO_INSTRUCTION_TMPL.format(role=role_text_only or "as defined above")
     messages = [{"role": "system", "content": role_prompt + tools_instruction}]
     # One [user] message: full transcript with "At <timestamp> <name> said: <content>" so who said what is clear.
-    transcript_lines = []
-    for entry in st.session_state.dialogue:
-        party, content = entry[0], entry[1]
-        ts = entry[2]
-        author_from_db = entry[3] if len(entry) >= 4 and entry[3] else None
-        label = author_from_db if author_from_db else _speaker_label(party)
-        formatted_ts = _format_in_pst(ts, "%Y-%m-%d %H:%M")
-        transcript_lines.append(f"At {formatted_ts} {label} said: {content}")
-    my_name = _speaker_label(speaker)
-    transcript_lines.append(f"[Reply now only as {my_name}.]")
-    messages.append({"role": "user", "content": "\n\n".join(transcript_lines)})
+    # The "reply only as <name>" instruction lives in the system prompt (_get_agent_role); the anchor is only
+    # sent when there is no transcript yet, since the model still needs a user turn to reply to.
+    transcript = _dialogue_transcript()
+    messages.append({"role": "user", "content": transcript or f"[Reply now only as {_speaker_label(speaker)}.]"})
     return messages
 
 
-def _build_messages_for_model(role_prompt: str, speaker: str, role_text_only: str | None = None) -> list:
+def _build_messages_for_model(role_prompt: str, speaker: str, role_text_only: str | None = None, tavily_enabled: bool = False) -> list:
     """Wrapper for model.call_model_for_agent: fills role_text_only when None."""
     ro = role_text_only if role_text_only is not None else _get_agent_role_text_only(speaker)
-    return build_messages_for_agent(role_prompt, speaker, role_text_only=ro)
+    return build_messages_for_agent(role_prompt, speaker, role_text_only=ro, tavily_enabled=tavily_enabled)
 
 
 def _truncate_middle(text: str, max_len: int) -> str:
@@ -648,7 +882,7 @@ def _run_agent_thinking_if_set(agent_key: str, agent_name: str, stream_placehold
         )
     _log_openai_request(agent_key, messages, reply)
     reply = _strip_agent_name_prefix(reply, agent_name)
-    st.session_state.dialogue.append((agent_key, reply, datetime.now(_UTC)))
+    _append_dialogue(_dialogue_entry(agent_key, reply, datetime.now(_UTC)))
     persist_message(st.session_state.get("conversation_id") or "", _speaker_label(agent_key), reply)
     _reload_dialogue_from_db()
     st.session_state[f"{agent_key}_thinking"] = False
@@ -709,8 +943,8 @@ def _confirm_delete_conversation_dialog():
     is_current = st.session_state.get("pending_delete_current", False)
     if cid and get_supabase():
         with st.expander("Conversation history", expanded=False):
-            messages = load_messages(cid)
-            for author, content, dt in reversed(messages):
+            messages = _load_conversation_rows(cid)
+            for author, content, dt, _row_id in reversed(messages):
                 ts_str = _format_in_pst(dt, "%Y-%m-%d %H:%M")
                 preview = (content[:200] + "…") if len(content) > 200 else content
                 st.text(f"{ts_str} {author}: {preview}")
@@ -765,12 +999,12 @@ def main():
                     st.error("Incorrect password.")
                 else:
                     if name_ok:
-                        st.session_state.moderator_name = name_ok[:15]
+                        _set_moderator_name(name_ok[:15])
                     st.session_state.authenticated = True
                     st.rerun()
             else:
                 if name_ok:
-                    st.session_state.moderator_name = name_ok[:15]
+                    _set_moderator_name(name_ok[:15])
                 st.rerun()
         st.stop()
 
@@ -786,8 +1020,9 @@ def main():
     st.title(f"{_mod_name}'s Open Dialogue with AI")
 
     # Model and Tavily status
-    st.caption(get_model_status(AGENT_1_NAME, AGENT_2_NAME))
-    st.caption(get_tavily_status())
+    model_status, tavily_status = _status_captions()
+    st.caption(model_status)
+    st.caption(tavily_status)
 
     # CSS: force thinking spinner left-aligned; prevent button text wrapping (e.g. Respond)
     st.markdown(
@@ -815,11 +1050,12 @@ def main():
             if new_id:
                 # Prepend new conversation to sidebar list so it shows immediately (avoid duplicate id in list)
                 _cache = [c for c in (st.session_state.conversation_list_cache or []) if c.get("id") != new_id]
-                st.session_state.conversation_list_cache = [{"id": new_id, "created_at": _now_pst()}] + _cache
+                st.session_state.conversation_list_cache = _sidebar_conv_rows([{"id": new_id, "created_at": _now_pst()}] + _cache)
                 st.session_state.conversation_list_cache_ts = time.time()
                 st.session_state.conversation_id = new_id
-                st.session_state.dialogue = []
+                _set_dialogue([])
                 st.session_state.loaded_conversation_id = None
+                st.session_state.history_visible_n = HISTORY_PAGE_SIZE
                 st.query_params["conversation_id"] = new_id
                 st.rerun()
 
@@ -827,33 +1063,24 @@ def main():
         def sidebar_conv_list():
             _now = time.time()
             if st.session_state.conversation_list_cache is None or (_now - st.session_state.conversation_list_cache_ts) >= 10:
-                st.session_state.conversation_list_cache = _dedupe_conv_list(list_conversations(50))
+                st.session_state.conversation_list_cache = _sidebar_conv_rows(list_conversations(50))
                 st.session_state.conversation_list_cache_ts = _now
-            conv_list = _dedupe_conv_list(st.session_state.conversation_list_cache)
+            conv_list = st.session_state.conversation_list_cache
             current_id = st.session_state.get("conversation_id") or ""
             # If current conversation was deleted by another user, clear selection. Don't clear when list is empty (e.g. refetch failed).
             if current_id and conv_list and current_id not in {c.get("id") for c in conv_list}:
                 _clear_conversation_state(clear_query_params=True)
                 st.rerun()
+            can_delete = _get_moderator_display_name().lower() == "admin"
             for c in conv_list:
-                cid = c.get("id") or ""
-                if not cid:
-                    continue
-                created = c.get("created_at")
-                created_str = _format_in_pst(created, "%Y-%m-%d %H:%M:%S") if created is not None else ""
-                if not created_str and created is not None:
-                    created_str = (str(created) if created else "")[:19].replace("T", " ")
-                label = "Conversation · " + created_str
-                if len(label) > 45:
-                    label = label[:42] + "..."
+                cid = c["id"]
                 is_current = cid == current_id
-                row_col, del_col = st.columns([5, 1])
+                row_col, del_col = st.columns(_COLS_5_1)
                 with row_col:
-                    if st.button(label, key=f"conv_{cid}", use_container_width=True, type="primary" if is_current else "secondary"):
+                    if st.button(c["label"], key=f"conv_{cid}", use_container_width=True, type="primary" if is_current else "secondary"):
                         st.query_params["conversation_id"] = cid
                         st.rerun()
                 with del_col:
-                    can_delete = _get_moderator_display_name().strip().lower() == "admin"
                     if st.button("×", key=f"del_{cid}", help="Delete conversation", disabled=not can_delete):
                         st.session_state.pending_delete_conv_id = cid
                         st.session_state.pending_delete_current = cid == current_id
@@ -898,7 +1125,7 @@ def main():
         st.divider()
         # Participants: human users who posted in this conversation
         _dialogue = st.session_state.get("dialogue") or []
-        _human_authors = sorted({e[3] for e in _dialogue if e[0] == ROLE_MODERATOR and len(e) >= 4 and e[3]})
+        _human_authors = sorted({e.label for e in _dialogue if e.party == ROLE_MODERATOR and e.label})
         with st.expander("Participants", expanded=False):
             if _human_authors:
                 for _name in _human_authors:
@@ -934,40 +1161,45 @@ def main():
     def conversation_history_fragment():
         conv_id = st.session_state.get("conversation_id") or ""
         if conv_id and get_supabase():
-            if not conversation_exists(conv_id):
-                _clear_conversation_state(clear_query_params=True)
-                st.rerun()
+            # Existence check runs on a worker thread, overlapping the message fetch below (one round trip of wall time instead of two)
+            exists_future = _db_executor().submit(conversation_exists, conv_id)
             current = st.session_state.get("dialogue") or []
             loaded_conv = st.session_state.get("loaded_conversation_id")
+            last_ts = _last_db_ts(current) if loaded_conv == conv_id else None
+            incremental = last_ts is not None
+            if incremental:
+                new_rows = _load_rows_after(conv_id, last_ts, _recent_entry_ids(current, last_ts))
+            else:
+                loaded = _load_conversation_rows(conv_id)
+            if not exists_future.result():
+                _clear_conversation_state(clear_query_params=True)
+                st.rerun()
+            dialogue_changed = False
             # Incremental load when we already have this conversation in session (avoid full load every 2s)
-            if loaded_conv == conv_id and current and len(current[-1]) >= 3:
-                last_ts = current[-1][2]
-                new_rows = load_messages_since(conv_id, last_ts)
+            if incremental:
                 if new_rows:
-                    new_entries = [(_author_display_name_to_party(a), m, t, a) for a, m, t in new_rows]
-                    st.session_state.dialogue = current + new_entries
+                    new_entries = _dialogue_entries_from_rows(new_rows)
+                    _set_dialogue(_merge_db_entries(current, new_entries), new_entries)
+                    dialogue_changed = True
             else:
                 # First load for this conversation or no last timestamp: full load
-                loaded = load_messages(conv_id)
-                new_dialogue = [(_author_display_name_to_party(a), m, t, a) for a, m, t in loaded]
+                new_dialogue = _dialogue_entries_from_rows(loaded)
                 if not _dialogue_equals(current, new_dialogue):
-                    st.session_state.dialogue = new_dialogue
+                    _set_dialogue(new_dialogue)
+                    dialogue_changed = True
                 st.session_state.loaded_conversation_id = conv_id
-            _sync_agent_intro_state_from_dialogue(st.session_state.dialogue)
-        SPEAKER_LABELS = {
-            ROLE_INSTRUCTOR: "Instructor",
-            ROLE_MODERATOR: _get_moderator_display_name(),
-            "agent1": AGENT_1_NAME,
-            "agent2": AGENT_2_NAME,
-        }
+            # Intro flags only depend on who has posted; rescan only when the dialogue changed (e.g. another user's agent reply arrived)
+            if dialogue_changed:
+                _sync_agent_intro_state_from_dialogue()
+        speaker_labels = _speaker_labels()
         if st.session_state.dialogue:
-            order_col, export_col = st.columns([3, 1])
+            order_col, export_col = st.columns(_COLS_3_1)
             with order_col:
                 if st.button("Reverse order", key="conv_history_reverse_order_btn"):
                     st.session_state.dialogue_newest_first = not st.session_state.dialogue_newest_first
-                    st.rerun()
+                    _rerun_fragment()
             with export_col:
-                docx_bytes = export_dialogue_to_docx(st.session_state.dialogue, SPEAKER_LABELS)
+                docx_bytes = _dialogue_docx_bytes(speaker_labels)
                 st.download_button(
                     "Export to doc",
                     data=docx_bytes,
@@ -978,7 +1210,15 @@ def main():
         st.subheader("Conversation history")
         if not st.session_state.dialogue:
             st.caption("No messages yet. Send an instructor or moderator message, or generate an agent response.")
-        messages = reversed(st.session_state.dialogue) if st.session_state.dialogue_newest_first else st.session_state.dialogue
+        # Render only the latest history_visible_n messages (each one is several Streamlit elements, re-sent every tick)
+        dialogue = st.session_state.dialogue
+        visible_n = st.session_state.history_visible_n
+        hidden_n = max(0, len(dialogue) - visible_n)
+        if st.session_state.dialogue_newest_first:
+            messages = islice(reversed(dialogue), visible_n)
+        else:
+            messages = islice(dialogue, hidden_n, None)
+            _show_older_messages_button(hidden_n)
         # When an agent is streaming, show the reply as a chat message inside this list (same panel as previous messages)
         _streaming = st.session_state.get("agent1_thinking") or st.session_state.get("agent2_thinking")
         if _streaming and st.session_state.dialogue_newest_first:
@@ -990,17 +1230,15 @@ def main():
                 st.session_state._stream_placeholder = _stream_ph
                 st.caption("Now")
         for entry in messages:
-            party, content = entry[0], entry[1]
-            ts = entry[2] if len(entry) >= 3 else None
-            label = entry[3] if len(entry) >= 4 and entry[3] else SPEAKER_LABELS.get(party, party)
-            if party in ("agent1", "agent2"):
-                content = _strip_agent_name_prefix(content, label)
-            is_human = party in (ROLE_INSTRUCTOR, ROLE_MODERATOR)
+            label = entry.label or speaker_labels.get(entry.party, entry.party)
+            is_human = entry.party in (ROLE_INSTRUCTOR, ROLE_MODERATOR)
             with st.chat_message("user" if is_human else "assistant"):
-                st.markdown(f"**{label}:**")
-                st.markdown(content)
-                if ts:
-                    st.caption(_format_in_pst(ts, "%Y-%m-%d %H:%M"))
+                # Label and content as two paragraphs of one markdown element (one element per message instead of two)
+                st.markdown(f"**{label}:**\n\n{entry.content}")
+                if entry.ts_display:
+                    st.caption(entry.ts_display)
+        if st.session_state.dialogue_newest_first:
+            _show_older_messages_button(hidden_n)
         if _streaming and not st.session_state.dialogue_newest_first:
             _which = "agent1" if st.session_state.get("agent1_thinking") else "agent2"
             _stream_label = AGENT_1_NAME if _which == "agent1" else AGENT_2_NAME
@@ -1010,6 +1248,12 @@ def main():
                 st.session_state._stream_placeholder = _stream_ph
                 st.caption("Now")
 
+    def _show_older_messages_button(hidden_n: int) -> None:
+        """Button that renders one more page of older history messages (fragment-only rerun); nothing when all are shown."""
+        if hidden_n and st.button(f"Show older messages ({hidden_n} hidden)", key="conv_history_show_older_btn"):
+            st.session_state.history_visible_n += HISTORY_PAGE_SIZE
+            _rerun_fragment()
+
     left_col, right_col = st.columns([1, 1])  # 50% left, 50% conversation history
 
     # Render right column first so streaming placeholder exists in conversation history when agent runs.
@@ -1031,26 +1275,14 @@ def main():
         if _current_radio != _prev_radio:
             st.session_state.send_as_radio_prev = _current_radio
         # Same width for chat input and agent rows; each Respond button on the same row as its agent (column [4,1] so button fits "Respond" on one line)
-        row0_col1, row0_col2 = st.columns([4, 1])
+        row0_col1, row0_col2 = st.columns(_COLS_4_1)
         with row0_col1:
             _agent_thinking = st.session_state.get("agent1_thinking") or st.session_state.get("agent2_thinking")
             human_prompt = st.chat_input("Type a message and press Enter to send", disabled=_agent_thinking)
-        # Move focus to chat input after selecting Moderator/Instructor
+        # Move focus to chat input after selecting Moderator/Instructor (one-shot; flag cleared before emitting)
         if st.session_state.get("focus_chat_input", False):
             st.session_state.focus_chat_input = False
-            st.markdown(
-                """
-                <script>
-                (function() {
-                    setTimeout(function() {
-                        var el = document.querySelector('textarea[placeholder*="Type a message"]') || document.querySelector('[data-testid="stChatInput"] textarea') || document.querySelector('textarea');
-                        if (el) { el.focus(); }
-                    }, 150);
-                })();
-                </script>
-                """,
-                unsafe_allow_html=True,
-            )
+            components.html(_FOCUS_CHAT_INPUT_JS, height=0)
         # Reflect together / Stop reflecting: under user message input
         _reflection_until = st.session_state.get("reflection_mode_until")
         _reflection_active = _reflection_until is not None and time.time() < _reflection_until
@@ -1078,10 +1310,10 @@ def main():
                 st.session_state.agent2_thinking = False
                 st.rerun()
 
-        row1_col1, row1_col2 = st.columns([4, 1])
+        row1_col1, row1_col2 = st.columns(_COLS_4_1)
         _render_agent_role_row("agent1", AGENT_1_NAME, AGENT_1_ROLE, row1_col1, row1_col2)
 
-        row2_col1, row2_col2 = st.columns([4, 1])
+        row2_col1, row2_col2 = st.columns(_COLS_4_1)
         _render_agent_role_row("agent2", AGENT_2_NAME, AGENT_2_ROLE, row2_col1, row2_col2)
 
         # Thinking spinner: agent reply streams into conversation history placeholder (created in fragment)
@@ -1097,7 +1329,7 @@ def main():
             text = human_prompt.strip()
             if text:
                 text_for_history = _expand_mentions_to_names(text)  # @g / @ j -> real names in history and for OpenAI
-                st.session_state.dialogue.append((role, text_for_history, datetime.now(_UTC)))
+                _append_dialogue(_dialogue_entry(role, text_for_history, datetime.now(_UTC)))
                 persist_message(st.session_state.get("conversation_id") or "", _speaker_label(role), text_for_history)
                 _reload_dialogue_from_db()
                 # Clear agent thinking on every new message; then set from @mention when Moderator posts
@@ -5,18 +5,26 @@ Export dialogue to a Word document (.docx).
 import io
 
 from docx import Document
+from docx.oxml import OxmlElement
+
+
+def _paragraph_element(text: str):
+    """Bare <w:p> with one run holding text; CT_R.text turns newlines and tabs into <w:br/> and <w:tab/> like Run.text."""
+    p = OxmlElement("w:p")
+    r = OxmlElement("w:r")
+    r.text = text
+    p.append(r)
+    return p
 
 
 def export_dialogue_to_docx(dialogue: list, speaker_labels: dict) -> bytes:
-    """Build a Word document with the full conversation in chronological order.
+    """Build a Word document with the full conversation in dialogue order (chronological, oldest first).
     Format per message: <date-and-time> Speaker: Message.
     """
     doc = Document()
-    # Ensure chronological order (oldest first)
-    entries = list(dialogue)
-    if entries and all(len(e) >= 3 and e[2] is not None for e in entries):
-        entries = sorted(entries, key=lambda e: e[2])
-    for entry in entries:
+    paragraphs = []
+    # The session dialogue is already oldest first (DB rows ordered by created_at, new messages appended), so no sort
+    for entry in dialogue:
         party, content = entry[0], entry[1]
         ts = entry[2] if len(entry) >= 3 else None
         label = entry[3] if len(entry) >= 4 and entry[3] else speaker_labels.get(party, party)
@@ -25,9 +33,14 @@ def export_dialogue_to_docx(dialogue: list, speaker_labels: dict) -> bytes:
         if message and not message.endswith("."):
             message += "."
         line = f"{date_time} {label}: {message}".strip()
-        doc.add_paragraph(line)
-        doc.add_paragraph()  # blank line between messages
+        paragraphs.append(_paragraph_element(line))
+        paragraphs.append(OxmlElement("w:p"))  # blank line between messages
+    # One splice into the body (before the trailing sectPr, where add_paragraph would put them) instead of one
+    # high-level add_paragraph call per line
+    body = doc.element.body
+    at = body.index(body.sectPr) if body.sectPr is not None else len(body)
+    body[at:at] = paragraphs
     buffer = io.BytesIO()
     doc.save(buffer)
-    buffer.seek(0)
+    # getvalue() hands back BytesIO's internal bytes without copying (CPython), and no rewind is needed for it
     return buffer.getvalue()
@@ -3,36 +3,79 @@ OpenAI and Gemini model calls for agent replies.
 Includes optional Tavily web search. Uses a callback for message building to avoid depending on the app.
 """
 
+import hashlib
 import json
 import os
+import random
+import threading
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from typing import Callable, Optional
 
 try:
-    from openai import OpenAI
+    from openai import OpenAI, APIConnectionError, InternalServerError, RateLimitError
 except ImportError:
     OpenAI = None
+    APIConnectionError = InternalServerError = RateLimitError = None
 
 try:
     from google import genai
+    from google.genai import errors as genai_errors
     from google.genai import types as genai_types
 except ImportError:
     genai = None
+    genai_errors = None
     genai_types = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Tool-call argument (de)serialization: orjson when installed (faster on every tool round), stdlib json otherwise.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the stdlib error either way.
+if orjson is not None:
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+else:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
 # Optional Tavily client for web search (TAVILY_API_KEY in env)
 _tavily_client = None
 _tavily_error: Optional[str] = None
 
+# Tavily result cache: normalized query -> (monotonic time stored, result, unit query embedding or None). LRU-bounded
+# with a freshness TTL; shared by both agents and across tool rounds. Lock because tool calls may run on worker threads.
+# Optional semantic tier (TAVILY_SEMANTIC_CACHE_THRESHOLD, e.g. 0.92): on an exact miss, reuse the result of the most
+# similar cached query by cosine similarity of OpenAI embeddings. Off by default (costs one embeddings call per miss).
+_TAVILY_CACHE_MAX_ENTRIES = 256
+_TAVILY_CACHE_TTL_SECONDS = 600
+_TAVILY_EMBEDDING_MODEL = "text-embedding-3-small"
+_tavily_cache: "OrderedDict[str, tuple[float, str, Optional[list[float]]]]" = OrderedDict()
+_tavily_cache_lock = threading.Lock()
+
+# Shared OpenAI / Gemini clients (module scope so their HTTP connection pools are reused across agent turns and reruns)
+_openai_client = None
+_gemini_client = None
+_gemini_search_tool_obj = None  # see _gemini_search_tool
+
 
 def get_tavily_client():
-    """Return Tavily client if TAVILY_API_KEY is set and client creation succeeded; else None."""
+    """Return Tavily client if TAVILY_API_KEY is set and client creation succeeded; else None.
+    A failed creation is remembered (see get_tavily_error) and not retried on every call."""
     global _tavily_client, _tavily_error
-    if _tavily_client is None and os.environ.get("TAVILY_API_KEY"):
+    if _tavily_client is not None or _tavily_error is not None:
+        return _tavily_client
+    if os.environ.get("TAVILY_API_KEY"):
         try:
             from tavily import TavilyClient
             _tavily_client = TavilyClient(api_key=os.environ["TAVILY_API_KEY"])
-            _tavily_error = None
         except Exception as e:
             _tavily_error = str(e)
     return _tavily_client
@@ -58,34 +101,117 @@ def get_tavily_status() -> str:
     return "Web search disabled — TAVILY_API_KEY not in environment."
 
 
+def _tavily_cache_get(key: str) -> Optional[str]:
+    """Cached result for a normalized query if present and fresh; else None."""
+    with _tavily_cache_lock:
+        hit = _tavily_cache.get(key)
+        if hit is None:
+            return None
+        if time.monotonic() - hit[0] >= _TAVILY_CACHE_TTL_SECONDS:
+            del _tavily_cache[key]
+            return None
+        _tavily_cache.move_to_end(key)
+        return hit[1]
+
+
+def _tavily_cache_get_similar(embedding: list[float], threshold: float) -> Optional[str]:
+    """Fresh cached result whose query embedding is most similar to embedding, if at least threshold; else None."""
+    best_key, best_sim = None, threshold
+    now = time.monotonic()
+    with _tavily_cache_lock:
+        for key, (stored, _result, cached_emb) in _tavily_cache.items():
+            if cached_emb is None or now - stored >= _TAVILY_CACHE_TTL_SECONDS:
+                continue
+            sim = sum(a * b for a, b in zip(embedding, cached_emb))  # both unit vectors: dot = cosine
+            if sim >= best_sim:
+                best_key, best_sim = key, sim
+        if best_key is None:
+            return None
+        _tavily_cache.move_to_end(best_key)
+        return _tavily_cache[best_key][1]
+
+
+@lru_cache(maxsize=None)
+def _get_tavily_semantic_threshold() -> Optional[float]:
+    """Cosine-similarity threshold from TAVILY_SEMANTIC_CACHE_THRESHOLD (0–1); None (semantic cache off) if unset or invalid."""
+    s = (os.environ.get("TAVILY_SEMANTIC_CACHE_THRESHOLD") or "").strip()
+    try:
+        t = float(s)
+    except ValueError:
+        return None
+    return t if 0.0 < t <= 1.0 else None
+
+
+def _embed_query(query: str) -> Optional[list[float]]:
+    """Unit-length OpenAI embedding of a search query, or None if OpenAI is unavailable or the call fails."""
+    if OpenAI is None or not os.environ.get("OPENAI_API_KEY"):
+        return None
+    try:
+        vec = _get_openai_client().embeddings.create(model=_TAVILY_EMBEDDING_MODEL, input=query).data[0].embedding
+    except Exception:
+        return None
+    norm = sum(x * x for x in vec) ** 0.5
+    return [x / norm for x in vec] if norm else None
+
+
+def _tavily_cache_put(key: str, result: str, embedding: Optional[list[float]] = None) -> None:
+    """Store a result, evicting the least recently used entries beyond the size bound."""
+    with _tavily_cache_lock:
+        _tavily_cache[key] = (time.monotonic(), result, embedding)
+        _tavily_cache.move_to_end(key)
+        while len(_tavily_cache) > _TAVILY_CACHE_MAX_ENTRIES:
+            _tavily_cache.popitem(last=False)
+
+
 def _run_tavily_search(query: str) -> str:
-    """Run a Tavily search and return a summary string for the model."""
+    """Run a Tavily search and return a summary string for the model. Successful results are cached by
+    normalized query (case and whitespace folded) for _TAVILY_CACHE_TTL_SECONDS, and optionally matched by
+    embedding similarity (see _get_tavily_semantic_threshold); failures are not cached."""
     client = get_tavily_client()
     if not client:
         return "Web search is not available (TAVILY_API_KEY is not set)."
+    key = " ".join(query.split()).lower()
+    cached = _tavily_cache_get(key)
+    if cached is not None:
+        return cached
+    threshold = _get_tavily_semantic_threshold()
+    embedding = _embed_query(key) if threshold is not None else None
+    if embedding is not None:
+        cached = _tavily_cache_get_similar(embedding, threshold)
+        if cached is not None:
+            return cached
     try:
         response = client.search(query=query, max_results=5, search_depth="basic")
         results = response.get("results", [])
         if not results:
-            return "No results found for that query."
-        parts = []
-        for i, r in enumerate(results[:5], 1):
-            title = r.get("title", "")
-            url = r.get("url", "")
-            content = r.get("content", "")
-            parts.append(f"[{i}] {title}\nURL: {url}\n{content}")
-        return "\n\n".join(parts)
+            result = "No results found for that query."
+        else:
+            result = "\n\n".join(
+                f"[{i}] {r.get('title', '')}\nURL: {r.get('url', '')}\n{r.get('content', '')}"
+                for i, r in enumerate(results[:5], 1)
+            )
     except Exception as e:
         return f"Search failed: {e}"
+    _tavily_cache_put(key, result, embedding)
+    return result
 
 
 def _run_tool(name: str, args: dict) -> str:
     """Execute a tool by name (e.g. web_search). Used internally by model calls."""
     if name == "web_search":
-        return _run_tavily_search(args.get("query", ""))
+        return _run_tavily_search(str(args.get("query") or ""))  # the model may send null or a non-string
     return f"Unknown tool: {name}"
 
 
+def _run_tools(calls: list[tuple[str, dict]]) -> list[str]:
+    """Execute the (name, args) tool calls of one model round. Multiple calls (I/O-bound web searches) run
+    concurrently so the round costs about the slowest search instead of the sum; results keep call order."""
+    if len(calls) <= 1:
+        return [_run_tool(name, args) for name, args in calls]
+    with ThreadPoolExecutor(max_workers=min(len(calls), 8)) as pool:
+        return list(pool.map(lambda call: _run_tool(*call), calls))
+
+
 # OpenAI tool definition for web search (used by both OpenAI and Gemini)
 SEARCH_TOOL = {
     "type": "function",
@@ -101,13 +227,27 @@ SEARCH_TOOL = {
         },
     },
 }
+# tools= list for OpenAI requests with web search (shared; the SDK only reads it)
+_OPENAI_SEARCH_TOOLS = [SEARCH_TOOL]
+
+
+def _get_openai_client():
+    """OpenAI client using OPENAI_API_KEY, created once and reused. The SDK's own retries are off so that
+    _call_with_retry is the one retry policy for both providers (otherwise attempts would multiply)."""
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"), max_retries=0)
+    return _openai_client
 
 
+# Env-derived settings below are lru_cached: .env is loaded once at startup, so they never change while running
+@lru_cache(maxsize=None)
 def _get_openai_model() -> str:
     """Model from OPENAI_MODEL env; default gpt-5-mini."""
     return (os.environ.get("OPENAI_MODEL") or "").strip() or "gpt-5-mini"
 
 
+@lru_cache(maxsize=None)
 def _get_openai_temperature(model: str) -> Optional[float]:
     """Temperature for chat completion: only when model is gpt-4o-mini, from OPENAI_TEMPERATURE; else None (API default)."""
     if model != "gpt-4o-mini":
@@ -133,6 +273,7 @@ def _get_openai_chat_kwargs(messages: list, *, tools: Optional[list] = None, str
     return kwargs
 
 
+@lru_cache(maxsize=None)
 def _get_agent_model_env(agent_key: str) -> str:
     """Return 'gemini' or 'openai' for the given agent. Uses AGENT1_USE_MODEL / AGENT2_USE_MODEL, fallback USE_MODEL."""
     key = "AGENT1_USE_MODEL" if agent_key == "agent1" else "AGENT2_USE_MODEL"
@@ -148,15 +289,20 @@ def _use_gemini_for_agent(agent_key: str) -> bool:
 
 
 def _get_gemini_client():
-    """Gemini client using GEMINI_API_KEY. Call only when the agent uses Gemini."""
-    return genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+    """Gemini client using GEMINI_API_KEY, created once and reused. Call only when the agent uses Gemini."""
+    global _gemini_client
+    if _gemini_client is None:
+        _gemini_client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+    return _gemini_client
 
 
+@lru_cache(maxsize=None)
 def _get_gemini_model() -> str:
     """Model from GEMINI_MODEL env; default gemini-2.0-flash."""
     return (os.environ.get("GEMINI_MODEL") or "").strip() or "gemini-2.0-flash"
 
 
+@lru_cache(maxsize=None)
 def _get_gemini_temperature() -> Optional[float]:
     """Temperature for Gemini (0–2). From GEMINI_TEMPERATURE; default 0.7 for more varied, less echo-like responses."""
     s = (os.environ.get("GEMINI_TEMPERATURE") or "").strip()
@@ -179,6 +325,23 @@ def get_model_status(agent1_name: str | None = None, agent2_name: str | None = N
     return f"{n1}: {s1} · {n2}: {s2}"
 
 
+# Placeholder thought_signature for replayed function_call parts that have none (skips validation, per Gemini docs)
+_DUMMY_THOUGHT_SIGNATURE = b"skip_thought_signature_validator"
+
+
+def _fc_name_args(fc) -> tuple[str, dict]:
+    """(name, args) of a Gemini function call (FunctionCall, Part-like or dict); args is {} when missing."""
+    name = getattr(fc, "name", None) or (fc.get("name") if isinstance(fc, dict) else "web_search")
+    args = getattr(fc, "args", None)
+    if args is None and hasattr(fc, "function_call"):
+        args = getattr(fc.function_call, "args", None)
+    if args is None and isinstance(fc, dict):
+        args = fc.get("args") or (fc.get("function_call") or {}).get("args", {})
+    if not isinstance(args, dict):
+        args = {}
+    return name, args
+
+
 def _openai_messages_to_gemini_contents(messages: list) -> tuple[list, Optional[str]]:
     """Convert OpenAI-format messages to (Gemini contents list, system_instruction or None).
     Drops system from contents and returns it as second element for config.system_instruction."""
@@ -199,17 +362,16 @@ def _openai_messages_to_gemini_contents(messages: list) -> tuple[list, Optional[
             if content:
                 parts.append(genai_types.Part.from_text(text=content))
             # Gemini 3/2.5 require thought_signature on function_call parts; use dummy when replayed from messages.
-            _dummy_sig = b"skip_thought_signature_validator"
             for tc in m.get("tool_calls") or []:
                 fn = tc.get("function") or {}
                 name = fn.get("name") or ""
                 args_str = fn.get("arguments") or "{}"
                 try:
-                    args = json.loads(args_str)
+                    args = _json_loads(args_str)
                 except json.JSONDecodeError:
                     args = {}
                 fc = genai_types.FunctionCall(name=name, args=args)
-                parts.append(genai_types.Part(function_call=fc, thought_signature=_dummy_sig))
+                parts.append(genai_types.Part(function_call=fc, thought_signature=_DUMMY_THOUGHT_SIGNATURE))
             if parts:
                 contents.append(genai_types.Content(role="model", parts=parts))
             continue
@@ -225,30 +387,157 @@ def _openai_messages_to_gemini_contents(messages: list) -> tuple[list, Optional[
 
 
 def _gemini_search_tool():
-    """Gemini Tool for web_search (single tool)."""
-    return genai_types.Tool(function_declarations=[
-        genai_types.FunctionDeclaration(
-            name="web_search",
-            description=SEARCH_TOOL["function"]["description"],
-            parameters_json_schema=SEARCH_TOOL["function"]["parameters"],
-        )
-    ])
+    """Gemini Tool for web_search (single tool), built once and reused."""
+    global _gemini_search_tool_obj
+    if _gemini_search_tool_obj is None:
+        _gemini_search_tool_obj = genai_types.Tool(function_declarations=[
+            genai_types.FunctionDeclaration(
+                name="web_search",
+                description=SEARCH_TOOL["function"]["description"],
+                parameters_json_schema=SEARCH_TOOL["function"]["parameters"],
+            )
+        ])
+    return _gemini_search_tool_obj
+
+
+# Model-call retries: transient provider errors (429, 5xx, connection/timeouts) are retried with exponential backoff
+# and full jitter so one rate-limit blip doesn't kill the turn (and the tool searches already done for it), and
+# sessions that hit the same 429 don't retry in lockstep. Waits are 1, 2, 4, 8 s at most (the last reaches the cap),
+# but never shorter than a delay the server asks for (Retry-After / RetryInfo), itself capped at _RETRY_AFTER_MAX_SECONDS.
+_RETRY_MAX_ATTEMPTS = 5
+_RETRY_BASE_SECONDS = 1.0
+_RETRY_CAP_SECONDS = 8.0
+_RETRY_AFTER_MAX_SECONDS = 60.0
+
+# Optional client-side requests-per-minute limit per provider (OPENAI_MAX_RPM / GEMINI_MAX_RPM; unset = no limit).
+# provider -> timestamps (monotonic) of calls in the last minute; lock because tool rounds and sessions share it.
+_rpm_calls: dict[str, deque] = {"openai": deque(), "gemini": deque()}
+_rpm_lock = threading.Lock()
+
+
+def _is_retryable_model_error(e: Exception) -> bool:
+    """True for rate-limit, server and connection errors from OpenAI or Gemini; False for everything else (bad request, auth, ...)."""
+    if OpenAI is not None and isinstance(e, (RateLimitError, InternalServerError, APIConnectionError)):
+        return True  # APITimeoutError is an APIConnectionError
+    if genai_errors is not None and isinstance(e, genai_errors.APIError):
+        return e.code == 429 or isinstance(e, genai_errors.ServerError)
+    return False
+
+
+def _server_retry_delay(e: Exception) -> Optional[float]:
+    """Seconds the provider asked us to wait before retrying, or None: OpenAI's retry-after-ms / Retry-After
+    response headers, or the retryDelay of a Gemini error's google.rpc.RetryInfo detail (e.g. "20s")."""
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    if headers is not None:
+        for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+            try:
+                return float(headers.get(name)) * scale
+            except (TypeError, ValueError):
+                pass  # missing, or Retry-After given as an HTTP date: fall back to backoff
+    error = getattr(e, "details", None)
+    if isinstance(error, dict):
+        error = error.get("error", error)
+        for detail in error.get("details") or []:
+            delay = detail.get("retryDelay") if isinstance(detail, dict) else None
+            if isinstance(delay, str) and delay.endswith("s"):
+                try:
+                    return float(delay[:-1])
+                except ValueError:
+                    pass
+    return None
+
+
+@lru_cache(maxsize=None)
+def _get_max_rpm(provider: str) -> Optional[int]:
+    """Client-side requests-per-minute cap from OPENAI_MAX_RPM / GEMINI_MAX_RPM; None if unset or invalid."""
+    s = (os.environ.get(f"{provider.upper()}_MAX_RPM") or "").strip()
+    try:
+        n = int(s)
+    except ValueError:
+        return None
+    return n if n > 0 else None
+
+
+@lru_cache(maxsize=None)
+def _response_cache_enabled() -> bool:
+    """True if OPEN_DIALOGUE_RESPONSE_CACHE=1: identical model requests reuse the earlier reply (see call_model_for_agent)."""
+    return (os.environ.get("OPEN_DIALOGUE_RESPONSE_CACHE") or "").strip() == "1"
+
+
+def _wait_for_rate_limit(provider: str) -> None:
+    """Block until a call to provider fits under its RPM cap (sliding one-minute window), then record it."""
+    max_rpm = _get_max_rpm(provider)
+    if max_rpm is None:
+        return
+    calls = _rpm_calls[provider]
+    while True:
+        with _rpm_lock:
+            now = time.monotonic()
+            while calls and now - calls[0] >= 60.0:
+                calls.popleft()
+            if len(calls) < max_rpm:
+                calls.append(now)
+                return
+            wait = 60.0 - (now - calls[0])
+        time.sleep(wait)
+
+
+def _call_with_retry(provider: str, fn: Callable, *args, **kwargs):
+    """Call fn(*args, **kwargs) under the provider's RPM cap, retrying transient errors up to _RETRY_MAX_ATTEMPTS
+    attempts. Each wait is uniform in [0, min(_RETRY_CAP_SECONDS, _RETRY_BASE_SECONDS * 2**attempt)] (full jitter),
+    raised to the server's requested delay (see _server_retry_delay) when it gives one."""
+    for attempt in range(_RETRY_MAX_ATTEMPTS):
+        _wait_for_rate_limit(provider)
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == _RETRY_MAX_ATTEMPTS - 1 or not _is_retryable_model_error(e):
+                raise
+            wait = random.uniform(0, min(_RETRY_CAP_SECONDS, _RETRY_BASE_SECONDS * 2 ** attempt))
+            server_delay = _server_retry_delay(e)
+            if server_delay is not None:
+                wait = max(wait, min(server_delay, _RETRY_AFTER_MAX_SECONDS))
+            time.sleep(wait)
+
 
+# Streaming placeholder refresh: each write re-sends the whole accumulated text to the browser, so write at most
+# ~20 times a second (plus once at the end) instead of once per token chunk.
+_STREAM_UPDATE_INTERVAL_SECONDS = 0.05
 
-def _stream_chat_completion(client, messages: list, tools: Optional[list], placeholder) -> str:
-    """Run a streaming chat completion; update placeholder with accumulated text. Returns full reply text."""
+
+def _stream_chat_completion(client, messages: list, tools: Optional[list], placeholder) -> tuple[str, list]:
+    """Run a streaming chat completion; update placeholder with accumulated text.
+    Returns (reply_text, tool_calls). tool_calls are assembled from streamed deltas in OpenAI message format
+    ({"id", "type", "function": {"name", "arguments"}}) and are empty when the model answered directly."""
     kwargs = _get_openai_chat_kwargs(messages, tools=tools, stream=True)
-    stream = client.chat.completions.create(**kwargs)
+    stream = _call_with_retry("openai", client.chat.completions.create, **kwargs)
     accumulated = ""
+    shown = 0  # len(accumulated) last written to the placeholder
+    last_update = 0.0
+    tool_calls: dict[int, dict] = {}  # delta index -> tool call being assembled
     for chunk in stream:
         if not chunk.choices:
             continue
         delta = chunk.choices[0].delta
-        content = getattr(delta, "content", None) or (delta.get("content") if isinstance(delta, dict) else None)
+        content = delta.content  # ChoiceDelta model: content and tool_calls are always present (None when absent)
         if content:
             accumulated += content
-            placeholder.text(accumulated)
-    return accumulated.strip()
+            now = time.monotonic()
+            if now - last_update >= _STREAM_UPDATE_INTERVAL_SECONDS:
+                placeholder.text(accumulated)
+                shown, last_update = len(accumulated), now
+        for tc in delta.tool_calls or ():
+            call = tool_calls.setdefault(tc.index, {"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+            if tc.id:
+                call["id"] = tc.id
+            if tc.function is not None:
+                if tc.function.name:
+                    call["function"]["name"] += tc.function.name
+                if tc.function.arguments:
+                    call["function"]["arguments"] += tc.function.arguments
+    if shown != len(accumulated):
+        placeholder.text(accumulated)
+    return accumulated.strip(), [tool_calls[i] for i in sorted(tool_calls)]
 
 
 def _stream_gemini(client, contents: list, system_instruction: Optional[str], tools: Optional[list], placeholder) -> str:
@@ -260,11 +549,24 @@ def _stream_gemini(client, contents: list, system_instruction: Optional[str], to
     )
     if tools:
         config.tools = tools
+    def _open_stream():
+        # The SDK sends the request on the first next(), so that is what has to be inside the retry
+        stream = iter(client.models.generate_content_stream(model=model, contents=contents, config=config))
+        return next(stream, None), stream
+
+    first, stream = _call_with_retry("gemini", _open_stream)
     accumulated = ""
-    for chunk in client.models.generate_content_stream(model=model, contents=contents, config=config):
+    shown = 0  # len(accumulated) last written to the placeholder
+    last_update = 0.0
+    for chunk in chain((first,) if first is not None else (), stream):
         if chunk.text:
             accumulated += chunk.text
-            placeholder.text(accumulated)
+            now = time.monotonic()
+            if now - last_update >= _STREAM_UPDATE_INTERVAL_SECONDS:
+                placeholder.text(accumulated)
+                shown, last_update = len(accumulated), now
+    if shown != len(accumulated):
+        placeholder.text(accumulated)
     return accumulated.strip()
 
 
@@ -273,49 +575,50 @@ def call_openai_for_agent(
     speaker: str,
     stream_placeholder=None,
     *,
-    build_messages_for_agent: Callable[[str, str, Optional[str]], list],
+    build_messages_for_agent: Callable[[str, str, Optional[str], bool], list],
+    messages: Optional[list] = None,
 ) -> tuple[str, list]:
-    """Call OpenAI chat completion for the given agent. Returns (reply_text, messages_sent)."""
+    """Call OpenAI chat completion for the given agent. Returns (reply_text, messages_sent).
+    messages, when given, is the already-built list from build_messages_for_agent and is used as is."""
     if OpenAI is None:
         raise ImportError("The openai package is required when an agent uses OpenAI.")
     role_text_only = None
-    messages = build_messages_for_agent(role_prompt, speaker, role_text_only)
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-    tools = [SEARCH_TOOL] if get_tavily_client() else None
+    tavily_enabled = get_tavily_client() is not None
+    if messages is None:
+        messages = build_messages_for_agent(role_prompt, speaker, role_text_only, tavily_enabled)
+    client = _get_openai_client()
+    tools = _OPENAI_SEARCH_TOOLS if tavily_enabled else None
     max_tool_rounds = 5
     for _ in range(max_tool_rounds):
-        if not tools and stream_placeholder:
-            reply = _stream_chat_completion(client, messages, None, stream_placeholder)
-            return (reply, messages)
-        kwargs = _get_openai_chat_kwargs(messages, tools=tools, stream=False)
-        response = client.chat.completions.create(**kwargs)
-        choice = response.choices[0]
-        msg = choice.message
-        if not getattr(msg, "tool_calls", None):
-            reply = (msg.content or "").strip()
-            if stream_placeholder and reply:
-                for i in range(1, len(reply) + 1):
-                    stream_placeholder.text(reply[:i])
-                    time.sleep(0.01)
-            return (reply, messages)
-        messages.append({
-            "role": "assistant",
-            "content": msg.content or "",
-            "tool_calls": [
+        # With a placeholder every round streams (text shows as it arrives); tool-call deltas are assembled from the stream.
+        if stream_placeholder:
+            reply, tool_calls = _stream_chat_completion(client, messages, tools, stream_placeholder)
+            if not tool_calls:
+                return (reply, messages)
+            content = reply
+        else:
+            kwargs = _get_openai_chat_kwargs(messages, tools=tools, stream=False)
+            response = _call_with_retry("openai", client.chat.completions.create, **kwargs)
+            msg = response.choices[0].message
+            if not getattr(msg, "tool_calls", None):
+                return ((msg.content or "").strip(), messages)
+            content = msg.content or ""
+            tool_calls = [
                 {"id": tc.id, "type": "function", "function": {"name": tc.function.name, "arguments": tc.function.arguments}}
                 for tc in msg.tool_calls
-            ],
-        })
-        for tc in msg.tool_calls:
-            name = tc.function.name
-            args = json.loads(tc.function.arguments) if tc.function.arguments else {}
-            result = _run_tool(name, args)
-            messages.append({"role": "tool", "tool_call_id": tc.id, "content": result})
+            ]
+        messages.append({"role": "assistant", "content": content, "tool_calls": tool_calls})
+        calls = []
+        for tc in tool_calls:
+            arguments = tc["function"]["arguments"]
+            calls.append((tc["function"]["name"], _json_loads(arguments) if arguments else {}))
+        for tc, result in zip(tool_calls, _run_tools(calls)):
+            messages.append({"role": "tool", "tool_call_id": tc["id"], "content": result})
     if stream_placeholder:
-        reply = _stream_chat_completion(client, messages, None, stream_placeholder)
+        reply, _ = _stream_chat_completion(client, messages, None, stream_placeholder)
     else:
         kwargs = _get_openai_chat_kwargs(messages, stream=False)
-        final = client.chat.completions.create(**kwargs)
+        final = _call_with_retry("openai", client.chat.completions.create, **kwargs)
         reply = (final.choices[0].message.content or "").strip()
     return (reply, messages)
 
@@ -325,85 +628,68 @@ def call_gemini_for_agent(
     speaker: str,
     stream_placeholder=None,
     *,
-    build_messages_for_agent: Callable[[str, str, Optional[str]], list],
+    build_messages_for_agent: Callable[[str, str, Optional[str], bool], list],
+    messages: Optional[list] = None,
 ) -> tuple[str, list]:
-    """Call Gemini for the given agent. Returns (reply_text, messages_sent)."""
+    """Call Gemini for the given agent. Returns (reply_text, messages_sent).
+    messages, when given, is the already-built list from build_messages_for_agent and is used as is."""
     role_text_only = None
-    messages = build_messages_for_agent(role_prompt, speaker, role_text_only)
+    tavily_enabled = get_tavily_client() is not None
+    if messages is None:
+        messages = build_messages_for_agent(role_prompt, speaker, role_text_only, tavily_enabled)
     client = _get_gemini_client()
-    gemini_tools = [_gemini_search_tool()] if get_tavily_client() else None
+    gemini_tools = [_gemini_search_tool()] if tavily_enabled else None
+    config = None  # built on the first round and reused: system instruction, temperature and tools don't change between rounds
+    # Converted once; each tool round appends its model and tool Content to contents alongside the messages entries
+    contents, system_instruction = _openai_messages_to_gemini_contents(messages)
     max_tool_rounds = 5
     for _ in range(max_tool_rounds):
-        contents, system_instruction = _openai_messages_to_gemini_contents(messages)
         if not gemini_tools and stream_placeholder:
             reply = _stream_gemini(client, contents, system_instruction, None, stream_placeholder)
             return (reply, messages)
-        config = genai_types.GenerateContentConfig(
-            system_instruction=system_instruction or "",
-            temperature=_get_gemini_temperature(),
-        )
-        if gemini_tools:
-            config.tools = gemini_tools
-        response = client.models.generate_content(model=_get_gemini_model(), contents=contents, config=config)
+        if config is None:
+            config = genai_types.GenerateContentConfig(
+                system_instruction=system_instruction or "",
+                temperature=_get_gemini_temperature(),
+            )
+            if gemini_tools:
+                config.tools = gemini_tools
+        response = _call_with_retry("gemini", client.models.generate_content, model=_get_gemini_model(), contents=contents, config=config)
         cand = response.candidates[0] if getattr(response, "candidates", None) else None
         model_response_parts = getattr(cand.content, "parts", None) if cand and getattr(cand, "content", None) else None
-        # Build text from parts to avoid SDK warning when response contains function_call parts
-        if model_response_parts:
-            text = "".join(getattr(p, "text", "") or "" for p in model_response_parts).strip()
-        else:
-            text = (response.text or "").strip()
-        function_calls = getattr(response, "function_calls", None) or []
-        if not function_calls and model_response_parts:
-            for part in model_response_parts:
-                fc = getattr(part, "function_call", None)
-                if fc is not None:
-                    function_calls.append(fc)
-        if not function_calls:
-            reply = text
-            if stream_placeholder and reply:
-                for i in range(1, len(reply) + 1):
-                    stream_placeholder.text(reply[:i])
-                    time.sleep(0.01)
-            return (reply, messages)
-
-        def _fc_name_args(fc):
-            name = getattr(fc, "name", None) or (fc.get("name") if isinstance(fc, dict) else "web_search")
-            args = getattr(fc, "args", None)
-            if args is None and hasattr(fc, "function_call"):
-                args = getattr(fc.function_call, "args", None)
-            if args is None and isinstance(fc, dict):
-                args = fc.get("args") or (fc.get("function_call") or {}).get("args", {})
-            if not isinstance(args, dict):
-                args = {}
-            return name, args
-
-        # Rebuild model parts so every function_call has thought_signature (required for Gemini 3 / 2.5).
-        # Use part.thought_signature when present, else dummy to skip validation (per Gemini docs).
-        _DUMMY_THOUGHT_SIG = b"skip_thought_signature_validator"
+        # One pass over the parts collects the reply text (built from parts to avoid the SDK warning when the response
+        # contains function_call parts), the (name, args) tool calls, and the model parts to replay. Every replayed
+        # function_call gets a thought_signature (required for Gemini 3 / 2.5): the part's own, else the dummy.
+        calls = []
+        model_parts = []
         if model_response_parts:
-            new_parts = []
+            text_parts = []
             for part in model_response_parts:
-                fc = getattr(part, "function_call", None)
+                if part.text:
+                    text_parts.append(part.text)
+                fc = part.function_call
                 if fc is not None:
-                    sig = getattr(part, "thought_signature", None) or _DUMMY_THOUGHT_SIG
-                    new_parts.append(genai_types.Part(function_call=fc, thought_signature=sig))
+                    calls.append(_fc_name_args(fc))
+                    model_parts.append(genai_types.Part(function_call=fc, thought_signature=part.thought_signature or _DUMMY_THOUGHT_SIGNATURE))
                 else:
-                    new_parts.append(part)
-            contents.append(genai_types.Content(role="model", parts=new_parts))
+                    model_parts.append(part)
+            text = "".join(text_parts).strip()
         else:
-            model_parts = []
+            text = (response.text or "").strip()
+            calls = [_fc_name_args(fc) for fc in getattr(response, "function_calls", None) or []]
             if text:
                 model_parts.append(genai_types.Part.from_text(text=text))
-            for fc in function_calls:
-                name, args = _fc_name_args(fc)
+            for name, args in calls:
                 fc_obj = genai_types.FunctionCall(name=name, args=args)
-                model_parts.append(genai_types.Part(function_call=fc_obj, thought_signature=_DUMMY_THOUGHT_SIG))
-            contents.append(genai_types.Content(role="model", parts=model_parts))
-        tool_results = []
-        for fc in function_calls:
-            name, args = _fc_name_args(fc)
-            result = _run_tool(name, args)
-            tool_results.append((name, result))
+                model_parts.append(genai_types.Part(function_call=fc_obj, thought_signature=_DUMMY_THOUGHT_SIGNATURE))
+        if not calls:
+            reply = text
+            if stream_placeholder and reply:
+                stream_placeholder.text(reply)
+            return (reply, messages)
+        contents.append(genai_types.Content(role="model", parts=model_parts))
+        results = _run_tools(calls)
+        for (name, _args), result in zip(calls, results):
             contents.append(genai_types.Content(
                 role="tool",
                 parts=[genai_types.Part.from_function_response(name=name, response={"result": result})],
@@ -411,11 +697,10 @@ def call_gemini_for_agent(
         messages.append({
             "role": "assistant",
             "content": text,
-            "tool_calls": [{"id": "", "function": {"name": n, "arguments": json.dumps(a)}} for n, a in (_fc_name_args(fc) for fc in function_calls)],
+            "tool_calls": [{"id": "", "function": {"name": n, "arguments": _json_dumps(a)}} for n, a in calls],
         })
-        for name, result in tool_results:
+        for result in results:
             messages.append({"role": "tool", "tool_call_id": "", "content": result})
-    contents, system_instruction = _openai_messages_to_gemini_contents(messages)
     if stream_placeholder:
         reply = _stream_gemini(client, contents, system_instruction, None, stream_placeholder)
     else:
@@ -423,25 +708,80 @@ def call_gemini_for_agent(
             system_instruction=system_instruction or "",
             temperature=_get_gemini_temperature(),
         )
-        final = client.models.generate_content(model=_get_gemini_model(), contents=contents, config=config)
+        final = _call_with_retry("gemini", client.models.generate_content, model=_get_gemini_model(), contents=contents, config=config)
         reply = (final.text or "").strip()
     return (reply, messages)
 
 
+# Opt-in model response cache (OPEN_DIALOGUE_RESPONSE_CACHE=1): blake2b of (backend, model, temperature, messages)
+# -> reply text. Off by default: re-asking an agent with an unchanged dialogue normally wants a fresh reply.
+# Only the reply is kept (a hit returns the caller's freshly built messages), so the size bound is the real footprint.
+# LRU-bounded by entry count and by total reply size; lock because sessions share it.
+_RESPONSE_CACHE_MAX_ENTRIES = 256
+_RESPONSE_CACHE_MAX_CHARS = 4_000_000
+_response_cache: "OrderedDict[bytes, str]" = OrderedDict()
+_response_cache_chars = 0
+_response_cache_lock = threading.Lock()
+
+
+def _response_cache_key(speaker: str, messages: list) -> bytes:
+    """Digest identifying a model request: backend, model, temperature and the exact messages."""
+    if _use_gemini_for_agent(speaker):
+        backend = ["gemini", _get_gemini_model(), _get_gemini_temperature()]
+    else:
+        model = _get_openai_model()
+        backend = ["openai", model, _get_openai_temperature(model)]
+    payload = json.dumps([backend, messages], sort_keys=True, ensure_ascii=False).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def _response_cache_get(key: bytes) -> Optional[str]:
+    """Cached reply for key, or None."""
+    with _response_cache_lock:
+        hit = _response_cache.get(key)
+        if hit is not None:
+            _response_cache.move_to_end(key)
+        return hit
+
+
+def _response_cache_put(key: bytes, reply: str) -> None:
+    """Store reply, evicting least recently used entries beyond the count or size bound."""
+    global _response_cache_chars
+    with _response_cache_lock:
+        old = _response_cache.pop(key, None)
+        if old is not None:
+            _response_cache_chars -= len(old)
+        _response_cache[key] = reply
+        _response_cache_chars += len(reply)
+        while _response_cache and (
+            len(_response_cache) > _RESPONSE_CACHE_MAX_ENTRIES or _response_cache_chars > _RESPONSE_CACHE_MAX_CHARS
+        ):
+            _key, evicted = _response_cache.popitem(last=False)
+            _response_cache_chars -= len(evicted)
+
+
 def call_model_for_agent(
     role_prompt: str,
     speaker: str,
     stream_placeholder=None,
     *,
-    build_messages_for_agent: Callable[[str, str, Optional[str]], list],
+    build_messages_for_agent: Callable[[str, str, Optional[str], bool], list],
 ) -> tuple[str, list]:
-    """Call OpenAI or Gemini for the given agent. Returns (reply_text, messages_sent)."""
-    if _use_gemini_for_agent(speaker):
-        return call_gemini_for_agent(
-            role_prompt, speaker, stream_placeholder,
-            build_messages_for_agent=build_messages_for_agent,
-        )
-    return call_openai_for_agent(
-        role_prompt, speaker, stream_placeholder,
-        build_messages_for_agent=build_messages_for_agent,
-    )
+    """Call OpenAI or Gemini for the given agent. Returns (reply_text, messages_sent).
+    With OPEN_DIALOGUE_RESPONSE_CACHE=1 an identical request (same backend, model and messages) returns the cached reply."""
+    cache_key = None
+    messages = None
+    if _response_cache_enabled():
+        # Build once here for the key; the backend call gets the same list instead of building it again
+        messages = build_messages_for_agent(role_prompt, speaker, None, get_tavily_client() is not None)
+        cache_key = _response_cache_key(speaker, messages)
+        cached = _response_cache_get(cache_key)
+        if cached is not None:
+            if stream_placeholder:
+                stream_placeholder.text(cached)
+            return (cached, messages)
+    call = call_gemini_for_agent if _use_gemini_for_agent(speaker) else call_openai_for_agent
+    result = call(role_prompt, speaker, stream_placeholder, build_messages_for_agent=build_messages_for_agent, messages=messages)
+    if cache_key is not None and result[0]:
+        _response_cache_put(cache_key, result[0])
+    return result
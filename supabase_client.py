@@ -4,21 +4,32 @@ Requires SUPABASE_URL and either SUPABASE_KEY or SUPABASE_SERVICE_ROLE_KEY in th
 """
 
 import os
+import threading
+import time
 import uuid as uuid_lib
-from datetime import datetime
-from zoneinfo import ZoneInfo
+from datetime import datetime, timezone
 
-_UTC = ZoneInfo("UTC")
+_UTC = timezone.utc
 
 _supabase_client = None
 
+# Short-TTL read caches shared by all sessions: every session's history fragment checks existence every 2 s and the
+# sidebar lists conversations every 10 s, but conversations come and go on human timescales. create/delete in this
+# process update them right away; changes made elsewhere show up within _READ_CACHE_TTL_SECONDS.
+_READ_CACHE_TTL_SECONDS = 5.0
+_exists_cache: dict[str, tuple[float, bool]] = {}  # conversation_id -> (monotonic time, exists)
+_list_cache: dict[int, tuple[float, list[dict]]] = {}  # limit -> (monotonic time, rows)
+_read_cache_lock = threading.Lock()
+
 
 def get_supabase():
     """Return Supabase client or None if URL/key not set."""
     global _supabase_client
+    if _supabase_client is not None:  # created (client) or attempted and failed (False): no env reads on the hot path
+        return _supabase_client or None
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_KEY") or os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
-    if _supabase_client is None and url and key:
+    if url and key:
         try:
             from supabase import create_client
             _supabase_client = create_client(url, key)
@@ -34,29 +45,47 @@ def create_conversation() -> str:
         return ""
     conv_id = str(uuid_lib.uuid4())
     try:
-        sb.table("od_conversations").insert({"id": conv_id}).execute()
+        sb.table("od_conversations").insert({"id": conv_id}, returning="minimal").execute()
+        with _read_cache_lock:
+            _exists_cache[conv_id] = (time.monotonic(), True)
+            _list_cache.clear()
         return conv_id
     except Exception:
         return ""
 
 
 def list_conversations(limit: int = 50) -> list[dict]:
-    """Return list of {id, created_at} sorted by created_at desc. created_at is normalized to timezone-aware UTC."""
+    """Return list of {id, created_at} sorted by created_at desc. created_at is normalized to timezone-aware UTC.
+    Cached for _READ_CACHE_TTL_SECONDS per limit (callers must not mutate the returned list)."""
     sb = get_supabase()
     if not sb:
         return []
+    with _read_cache_lock:
+        hit = _list_cache.get(limit)
+    if hit is not None and time.monotonic() - hit[0] < _READ_CACHE_TTL_SECONDS:
+        return hit[1]
     try:
         r = sb.table("od_conversations").select("id, created_at").order("created_at", desc=True).limit(limit).execute()
-        return [
+        rows = [
             {"id": row["id"], "created_at": _sanitize_timestamp(row.get("created_at"))}
             for row in (r.data or [])
         ]
     except Exception:
         return []
+    with _read_cache_lock:
+        _list_cache[limit] = (time.monotonic(), rows)
+    return rows
 
 
 def _sanitize_timestamp(ts: object) -> datetime:
     """Normalize a DB created_at value to timezone-aware UTC datetime. Handles datetime, ISO string, or None."""
+    if isinstance(ts, str):
+        # Fast path for what PostgREST returns (ISO 8601 with offset); fromisoformat accepts "Z" too on 3.11+
+        try:
+            dt = datetime.fromisoformat(ts)
+        except ValueError:
+            return datetime.now(_UTC)
+        return dt.astimezone(_UTC) if dt.tzinfo is not None else dt.replace(tzinfo=_UTC)
     if ts is None:
         return datetime.now(_UTC)
     try:
@@ -74,26 +103,26 @@ def _sanitize_timestamp(ts: object) -> datetime:
 
 
 def _parse_message_row(row: dict) -> tuple:
-    """Parse a single od_messages row to (role, message, dt)."""
-    dt = _sanitize_timestamp(row.get("created_at"))
-    return (row.get("role", ""), row.get("message", ""), dt)
+    """Parse a single od_messages row to (role, message, dt, id)."""
+    return (row.get("role", ""), row.get("message", ""), _sanitize_timestamp(row.get("created_at")), row.get("id"))
 
 
 def load_messages(conversation_id: str) -> list[tuple]:
-    """Return list of (author_display_name, message, datetime) in chronological order. role column stores the display name of who posted."""
+    """Return list of (author_display_name, message, datetime, id) in chronological order. role column stores the display name of who posted."""
     sb = get_supabase()
     if not sb:
         return []
     try:
-        r = sb.table("od_messages").select("created_at, role, message").eq("conversation_id", conversation_id).order("created_at").execute()
+        # id breaks created_at ties: rows written in one transaction share its now()
+        r = sb.table("od_messages").select("id, created_at, role, message").eq("conversation_id", conversation_id).order("created_at").order("id").execute()
         return [_parse_message_row(row) for row in (r.data or [])]
     except Exception:
         return []
 
 
 def load_messages_since(conversation_id: str, after_created_at: datetime) -> list[tuple]:
-    """Return list of (author_display_name, message, datetime) for messages with created_at > after_created_at, in chronological order.
-    Use for incremental reload; after_created_at should be UTC."""
+    """Return list of (author_display_name, message, datetime, id) for messages with created_at >= after_created_at, in chronological order.
+    Use for incremental reload (callers skip rows they already hold by id); after_created_at should be UTC."""
     sb = get_supabase()
     if not sb or not conversation_id:
         return []
@@ -101,10 +130,11 @@ def load_messages_since(conversation_id: str, after_created_at: datetime) -> lis
         ts_str = after_created_at.astimezone(_UTC).isoformat()
         r = (
             sb.table("od_messages")
-            .select("created_at, role, message")
+            .select("id, created_at, role, message")
             .eq("conversation_id", conversation_id)
-            .gt("created_at", ts_str)
+            .gte("created_at", ts_str)
             .order("created_at")
+            .order("id")
             .execute()
         )
         return [_parse_message_row(row) for row in (r.data or [])]
@@ -113,15 +143,25 @@ def load_messages_since(conversation_id: str, after_created_at: datetime) -> lis
 
 
 def conversation_exists(conversation_id: str) -> bool:
-    """Return True if the conversation exists in od_conversations."""
+    """Return True if the conversation exists in od_conversations. Cached for _READ_CACHE_TTL_SECONDS per id."""
     sb = get_supabase()
     if not sb or not conversation_id:
         return False
+    with _read_cache_lock:
+        hit = _exists_cache.get(conversation_id)
+    if hit is not None and time.monotonic() - hit[0] < _READ_CACHE_TTL_SECONDS:
+        return hit[1]
     try:
-        r = sb.table("od_conversations").select("id").eq("id", conversation_id).limit(1).execute()
-        return bool(r.data and len(r.data) > 0)
+        # HEAD + exact count: PostgREST answers with only a Content-Range header, no row body
+        r = sb.table("od_conversations").select("id", count="exact", head=True).eq("id", conversation_id).execute()
+        exists = bool(r.count)
     except Exception:
         return False
+    with _read_cache_lock:
+        if len(_exists_cache) >= 1024:
+            _exists_cache.clear()
+        _exists_cache[conversation_id] = (time.monotonic(), exists)
+    return exists
 
 
 def delete_conversation(conversation_id: str) -> bool:
@@ -131,6 +171,9 @@ def delete_conversation(conversation_id: str) -> bool:
         return False
     try:
         sb.table("od_conversations").delete().eq("id", conversation_id).execute()
+        with _read_cache_lock:
+            _exists_cache[conversation_id] = (time.monotonic(), False)
+            _list_cache.clear()
         return True
     except Exception:
         return False
@@ -144,7 +187,8 @@ def persist_message(conversation_id: str, author_display_name: str, message: str
         return
     try:
         payload = {"conversation_id": conversation_id, "role": author_display_name, "message": message}
-        # Omit created_at so Postgres DEFAULT now() is used (DB server time); avoids wrong time when app host clock is stale
-        sb.table("od_messages").insert(payload).execute()
+        # Omit created_at so Postgres DEFAULT now() is used (DB server time); avoids wrong time when app host clock is stale.
+        # returning=minimal: we never read the inserted row back from the response, so don't have PostgREST serialize it.
+        sb.table("od_messages").insert(payload, returning="minimal").execute()
     except Exception:
         pass
@@ -17,4 +17,9 @@ create table if not exists od_messages (
   message text not null
 );
 
-create index if not exists od_messages_conversation_id_idx on od_messages(conversation_id);
+-- Superseded by the composite index below (its leading column serves conversation_id lookups); on an existing
+-- database, run this drop together with the create index below
+drop index if exists od_messages_conversation_id_idx;
+
+-- Matches every message query: filter by conversation_id, range/order on created_at (id breaks ties)
+create index if not exists od_messages_conversation_created_idx on od_messages(conversation_id, created_at, id);